@@ -1,12 +1,13 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy.interpolate import griddata
-from matplotlib.colors import ListedColormap, BoundaryNorm
-from PIL import Image, ImageDraw, ImageFont
 import io
+import numpy as np
+
+from warmup import heatmap_colormap, is_warm, load_font, use_headless_backend, warm_up, LEVELS
+
+# pandas, matplotlib, SciPy and Pillow are imported inside the functions that
+# use them so the module itself imports quickly; warm_up() pays for them once.
+use_headless_backend()
 
 app = Flask(__name__)
 CORS(app)
@@ -16,8 +17,15 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB limit
 def home():
     return "Heatmap API is running."
 
+@app.route('/ready')
+def ready():
+    if not is_warm():
+        return jsonify({'ready': False}), 503
+    return jsonify({'ready': True})
+
 @app.route('/upload_image', methods=['POST'])
 def upload_image():
+    from PIL import Image
     if 'image' not in request.files:
         return jsonify({'error': 'No image file provided'}), 400
     file = request.files['image']
@@ -32,19 +40,27 @@ def upload_image():
 
 @app.route('/generate_heatmap', methods=['POST'])
 def generate_heatmap():
+    from PIL import Image
     data = request.json.get('data')
     rows = int(request.json.get('rows'))
     cols = int(request.json.get('cols'))
     file = request.files['image']
     image = Image.open(file)
-    grid = pd.DataFrame(data).reindex(index=np.arange(rows), columns=np.arange(cols))
+    grid = grid_from_request(data, rows, cols)
     heatmap = plot_heatmap(grid, "Heatmap of % Volumetrischer Wassergehalt", image)
     return send_file(heatmap, mimetype='image/png')
 
 
 def create_empty_grid(rows, cols):
+    import pandas as pd
     return pd.DataFrame(np.nan, index=np.arange(rows), columns=np.arange(cols))
 
+def grid_from_request(data, rows, cols):
+    import pandas as pd
+    # JSON object keys are always strings; the grid is labelled by integers
+    grid = pd.DataFrame(data, dtype=float).rename(index=int, columns=int)
+    return grid.reindex(index=np.arange(rows), columns=np.arange(cols))
+
 def calculate_summary_statistics(data):
     values = data.values.flatten()
     values = values[~np.isnan(values)]
@@ -62,7 +78,11 @@ def calculate_summary_statistics(data):
     
     return summary
 
-def plot_heatmap(data, title, image):
+def draw_heatmap(data, title, image=None):
+    # Without an image only the heatmap layer is drawn, on the same square
+    # cells imshow would give, so it can be laid over the image elsewhere
+    import matplotlib.pyplot as plt
+    from scipy.interpolate import griddata
     values = data.values.flatten()
     grid_size = data.shape
 
@@ -72,13 +92,14 @@ def plot_heatmap(data, title, image):
     grid_x, grid_y = np.mgrid[0:grid_size[1]:100j, 0:grid_size[0]:100j]
     grid_z = griddata(points, values_list, (grid_x, grid_y), method='cubic')
 
-    levels = [0, 9, 16, 20, 25]
-    colors = ['yellow', 'limegreen', 'green', 'darkgreen']
-    cmap = ListedColormap(colors)
-    norm = BoundaryNorm(levels, ncolors=cmap.N, clip=True)
+    levels = LEVELS
+    cmap, norm = heatmap_colormap()
 
     fig, ax = plt.subplots(figsize=(10, 8))
-    ax.imshow(image, extent=[0, grid_size[1], grid_size[0], 0])
+    if image is None:
+        ax.set_aspect('equal')
+    else:
+        ax.imshow(image, extent=[0, grid_size[1], grid_size[0], 0])
     contourf = ax.contourf(grid_x, grid_y, grid_z, levels=levels, cmap=cmap, norm=norm, alpha=0.9, extend='both')
 
     cbar_ax = fig.add_axes([0.95, 0.52, 0.01, 0.25])
@@ -104,14 +125,20 @@ def plot_heatmap(data, title, image):
     ax.set_xlim([0, grid_size[1]])
     ax.set_ylim([grid_size[0], 0])
     ax.axis('off')
-    plt.subplots_adjust(left=0.05, right=0.9, top=0.95, bottom=0.05)
+    fig.subplots_adjust(left=0.05, right=0.9, top=0.95, bottom=0.05)
+    return fig, ax
 
+def plot_heatmap(data, title, image):
+    import matplotlib.pyplot as plt
+    fig, ax = draw_heatmap(data, title, image)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
+    fig.savefig(buf, format='png')
+    plt.close(fig)
     buf.seek(0)
     return buf
 
 def draw_grid(image, rows, cols):
+    from PIL import ImageDraw
     img = image.copy()
     draw = ImageDraw.Draw(img)
     width, height = img.size
@@ -124,7 +151,7 @@ def draw_grid(image, rows, cols):
         y = i * height // rows
         draw.line([(0, y), (width, y)], fill=(0, 0, 0), width=1)
 
-    font = ImageFont.truetype("arial.ttf", 10)  # Ensure arial.ttf is available in your environment
+    font = load_font("arial.ttf", 10)  # Ensure arial.ttf is available in your environment
     for i in range(cols):
         draw.text((i * width // cols + width // (2 * cols), 0), f'{i}', fill=(0, 0, 0), font=font)
     for j in range(rows):
@@ -133,4 +160,5 @@ def draw_grid(image, rows, cols):
     return img
 
 if __name__ == '__main__':
+    warm_up()
     app.run(debug=True)
@@ -0,0 +1,61 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# Measures cold start of each entry point in a fresh interpreter:
+#   import  - time to import the module (heavy libraries should not load here)
+#   warm_up - time for warmup.warm_up() (imports, fonts, colormaps, Qhull)
+#   render  - time for the first heatmap render after warm-up
+#
+# Usage: python bench_startup.py [repeats]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+WARM_SNIPPET = """
+import io, time
+import warmup
+warmup.use_headless_backend()
+t = time.perf_counter()
+warmup.warm_up()
+t_warm = time.perf_counter() - t
+
+import numpy as np
+import app
+from PIL import Image
+grid = app.create_empty_grid(15, 15)
+grid.iloc[2:13, 2:13] = np.random.default_rng(0).uniform(5, 25, size=(11, 11))
+t = time.perf_counter()
+app.plot_heatmap(grid, 'bench', Image.new('RGB', (300, 300), 'white'))
+print(t_warm, time.perf_counter() - t)
+"""
+
+
+def run(snippet):
+    out = subprocess.run([sys.executable, '-c', snippet], cwd=HERE, capture_output=True, text=True, check=True)
+    return [float(x) for x in out.stdout.split()]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # heatmap_app_FINAL.py runs its Streamlit page at import, so only the
+    # modules that can be imported on their own are timed here
+    for module in ['app', 'hm', 'warmup']:
+        times = [run(IMPORT_SNIPPET.format(module=module))[0] for _ in range(repeats)]
+        print(f"import {module:<8} median {statistics.median(times) * 1000:8.1f} ms")
+
+    results = [run(WARM_SNIPPET) for _ in range(repeats)]
+    print(f"warm_up         median {statistics.median(r[0] for r in results) * 1000:8.1f} ms")
+    print(f"first render    median {statistics.median(r[1] for r in results) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
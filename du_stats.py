@@ -0,0 +1,231 @@
+import math
+import random
+
+# Incremental version of calculate_summary_statistics for cell-by-cell entry.
+# Values are kept in a treap ordered by (value, cell) whose nodes also carry
+# the size and sum of their subtree, so the count/sum of every value up to the
+# 25th percentile is a single O(log n) walk instead of a sort of the grid.
+# Subtree sums are exact integers in units of 2**-1074 (the smallest float
+# step), so repeated edits never accumulate rounding error and every sum comes
+# out correctly rounded.
+
+_SCALE = 1 << 1074
+
+
+def _exact(value):
+    numerator, denominator = value.as_integer_ratio()
+    return numerator * (_SCALE // denominator)
+
+
+def _to_float(total):
+    # int / int true division is correctly rounded in Python
+    return total / _SCALE
+
+
+class _Node:
+    __slots__ = ('key', 'prio', 'left', 'right', 'size', 'exact', 'total')
+
+    def __init__(self, key, prio):
+        self.key = key
+        self.prio = prio
+        self.left = None
+        self.right = None
+        self.size = 1
+        self.exact = _exact(key[0])
+        self.total = self.exact
+
+
+def _update(node):
+    node.size = 1
+    node.total = node.exact
+    if node.left is not None:
+        node.size += node.left.size
+        node.total += node.left.total
+    if node.right is not None:
+        node.size += node.right.size
+        node.total += node.right.total
+
+
+def _split(node, key):
+    # Returns (keys < key, keys >= key)
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key)
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.prio > right.prio:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _delete(node, key):
+    if node.key == key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _delete(node.left, key)
+    else:
+        node.right = _delete(node.right, key)
+    _update(node)
+    return node
+
+
+def _lerp(a, b, t):
+    # Same formula np.percentile uses for its default 'linear' method
+    diff = b - a
+    if t >= 0.5:
+        return b - diff * (1 - t)
+    return a + diff * t
+
+
+def _div(a, b):
+    # Float division that gives nan/inf on zero like NumPy instead of raising
+    if b == 0:
+        if a == 0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a)
+    return a / b
+
+
+class IncrementalDUStatistics:
+    """Summary statistics of a box grid, updated one box at a time.
+
+    Setting, changing or clearing a box costs O(log n) and ``summary()``
+    costs O(log n), where n is the number of boxes with data. The summary has
+    the same keys as ``calculate_summary_statistics``, and the 25th
+    percentile threshold and the counts are identical to it. The float
+    values are not bit-for-bit identical: sums here are correctly rounded,
+    while NumPy's pairwise sum depends on the order of the boxes in the
+    grid. For non-negative readings they agree to a relative tolerance of
+    1e-12, so display them rounded rather than unformatted.
+    """
+
+    def __init__(self, seed=0):
+        self._root = None
+        self._cells = {}
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_grid(cls, grid):
+        stats = cls()
+        stats.sync(grid)
+        return stats
+
+    def __len__(self):
+        return len(self._cells)
+
+    def set(self, row, col, value):
+        """Set box (row, col) to ``value``; None or NaN clears it."""
+        cell = (row, col)
+        old = self._cells.get(cell)
+        if value is None or math.isnan(value):
+            if old is not None:
+                self._root = _delete(self._root, old)
+                del self._cells[cell]
+            return
+        key = (float(value), cell)
+        if old == key:
+            return
+        if old is not None:
+            self._root = _delete(self._root, old)
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key, self._random.random())), right)
+        self._cells[cell] = key
+
+    def clear(self, row, col):
+        self.set(row, col, None)
+
+    def sync(self, grid):
+        """Apply every box of a ``create_empty_grid`` style DataFrame that differs from the current state."""
+        seen = set()
+        values = grid.to_numpy(dtype=float).tolist()
+        for row, row_values in zip(grid.index, values):
+            for col, value in zip(grid.columns, row_values):
+                if math.isnan(value):
+                    continue
+                seen.add((row, col))
+                self.set(row, col, value)
+        for cell in [cell for cell in self._cells if cell not in seen]:
+            self.clear(*cell)
+
+    def _kth(self, k):
+        # Value with 0-based rank k
+        node = self._root
+        while True:
+            left_size = node.left.size if node.left is not None else 0
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return node.key[0]
+            else:
+                k -= left_size + 1
+                node = node.right
+
+    def _count_sum_le(self, threshold):
+        # Count and sum of all values <= threshold; they form a prefix of the order
+        count, total = 0, 0
+        node = self._root
+        while node is not None:
+            if node.key[0] <= threshold:
+                if node.left is not None:
+                    count += node.left.size
+                    total += node.left.total
+                count += 1
+                total += node.exact
+                node = node.right
+            else:
+                node = node.left
+        return count, _to_float(total)
+
+    def percentile_25(self):
+        n = len(self._cells)
+        if n == 0:
+            return math.nan
+        index = (n - 1) * 0.25
+        lo = math.floor(index)
+        hi = min(lo + 1, n - 1)
+        return _lerp(self._kth(lo), self._kth(hi), index - lo)
+
+    def summary(self):
+        n = len(self._cells)
+        if n == 0:
+            return {
+                'sum_all_boxes': 0.0,
+                'count_boxes_with_data': 0,
+                'average_all_samples': math.nan,
+                'no_of_cups_lowest_quarter': 0,
+                'sum_values_lowest_quarter': 0.0,
+                'count_boxes_lowest_quarter': 0,
+                'average_lowest_quarter': math.nan,
+                'distribution_uniformity': math.nan
+            }
+
+        total = _to_float(self._root.total)
+        average = total / n
+        low_count, low_sum = self._count_sum_le(self.percentile_25())
+        low_average = _div(low_sum, low_count)
+
+        return {
+            'sum_all_boxes': total,
+            'count_boxes_with_data': n,
+            'average_all_samples': average,
+            'no_of_cups_lowest_quarter': low_count,
+            'sum_values_lowest_quarter': low_sum,
+            'count_boxes_lowest_quarter': low_count,
+            'average_lowest_quarter': low_average,
+            'distribution_uniformity': _div(low_average, average) * 100
+        }
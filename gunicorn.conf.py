@@ -0,0 +1,24 @@
+# Gunicorn settings for serving app.py with pre-warmed workers:
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# With HEATMAP_PREFORK=1 (the default) the app is loaded and warmed once in the
+# master before it binds the port, and every forked worker inherits the
+# imported modules, font cache and colormaps. With HEATMAP_PREFORK=0 each
+# worker warms itself after it boots instead.
+import os
+
+bind = os.environ.get('HEATMAP_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('HEATMAP_WORKERS', 2))
+preload_app = os.environ.get('HEATMAP_PREFORK', '1') == '1'
+
+
+def on_starting(server):
+    if preload_app:
+        from warmup import warm_up
+        warm_up()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        from warmup import warm_up
+        warm_up()
@@ -1,14 +1,15 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.interpolate import griddata
-from matplotlib.colors import ListedColormap, BoundaryNorm
-from PIL import Image, ImageDraw
-from scipy.spatial import ConvexHull, QhullError
+
+from du_stats import IncrementalDUStatistics
+from warmup import heatmap_colormap, warm_up, LEVELS
+
+# pandas, matplotlib, SciPy and Pillow are imported where they are used so the
+# script starts quickly; warm_up() below loads them once per server process.
 
 # Function to create an empty grid
 def create_empty_grid(rows, cols):
+    import pandas as pd
     return pd.DataFrame(np.nan, index=np.arange(rows), columns=np.arange(cols))
 
 # Function to calculate summary statistics
@@ -31,7 +32,9 @@ def calculate_summary_statistics(data):
     return summary
 
 # Function to plot heatmap
-def plot_heatmap(data, title, image):
+def plot_heatmap(data, title, image, summary=None):
+    import matplotlib.pyplot as plt
+    from scipy.interpolate import griddata
     values = data.values.flatten()
     grid_size = data.shape
 
@@ -49,10 +52,8 @@ def plot_heatmap(data, title, image):
         st.error("Invalid number of dimensions in xi. Ensure there are values in the selected grids.")
         return
 
-    levels = [0, 9, 16, 20, 25]
-    colors = ['yellow', 'limegreen', 'green', 'darkgreen']
-    cmap = ListedColormap(colors)
-    norm = BoundaryNorm(levels, ncolors=cmap.N, clip=True)
+    levels = LEVELS
+    cmap, norm = heatmap_colormap()
 
     fig, ax = plt.subplots(figsize=(10, 8))
     ax.imshow(image, extent=[0, grid_size[1], grid_size[0], 0])
@@ -66,13 +67,14 @@ def plot_heatmap(data, title, image):
     cbar.ax.tick_params(labelsize=8)
 
     # Calculate summary statistics
-    summary = calculate_summary_statistics(data)
+    if summary is None:
+        summary = calculate_summary_statistics(data)
     summary_text = '\n'.join([
-        f"Sum: {summary['sum_all_boxes']}",
+        f"Sum: {summary['sum_all_boxes']:.2f}",
         f"Count: {summary['count_boxes_with_data']}",
         f"Avg: {summary['average_all_samples']:.2f}",
         f"Low Qtr Cups: {summary['no_of_cups_lowest_quarter']}",
-        f"Low Qtr Sum: {summary['sum_values_lowest_quarter']}",
+        f"Low Qtr Sum: {summary['sum_values_lowest_quarter']:.2f}",
         f"Low Qtr Count: {summary['count_boxes_lowest_quarter']}",
         f"Low Qtr Avg: {summary['average_lowest_quarter']:.2f}",
         f"DUlq: {summary['distribution_uniformity']:.2f}%"
@@ -94,6 +96,7 @@ def plot_heatmap(data, title, image):
 
 # Function to draw grid on image
 def draw_grid(image, rows, cols):
+    from PIL import ImageDraw
     img = image.copy()
     draw = ImageDraw.Draw(img)
     width, height = img.size
@@ -111,9 +114,13 @@ def draw_grid(image, rows, cols):
 # Streamlit app
 st.title("Interactive Heatmap Generator")
 
+# Only the first session in a process pays for this; later calls return at once
+warm_up()
+
 # User uploads image
 uploaded_file = st.file_uploader("Upload Land Image", type=["jpg", "jpeg", "png"])
 if uploaded_file is not None:
+    from PIL import Image
     image = Image.open(uploaded_file)
     st.image(image, caption="Uploaded Land Image", use_column_width=True)
     
@@ -131,8 +138,34 @@ if uploaded_file is not None:
 
     # User input for entering values
     st.write("### Enter Values for Selected Cells")
-    edited_grid = st.data_editor(grid, use_container_width=True)
+    # One editor (and one set of statistics) per uploaded image and grid shape
+    editor_key = f"grid_editor_{uploaded_file.file_id}_{rows}_{cols}"
+
+    # Streamlit drops the editor's state whenever the editor is not drawn, so
+    # a missing key means the editor starts empty and the statistics must too
+    if editor_key not in st.session_state or st.session_state.get('du_stats_editor') != editor_key:
+        st.session_state['du_stats'] = IncrementalDUStatistics()
+        st.session_state['du_stats_editor'] = editor_key
+    edited_grid = st.data_editor(grid, use_container_width=True, key=editor_key)
+
+    # The editor reports the cells edited so far in edited_rows; unchanged
+    # cells are no-ops in du_stats.set, so only boxes whose value changed
+    # touch the statistics.
+    du_stats = st.session_state['du_stats']
+    for row, edits in st.session_state[editor_key]['edited_rows'].items():
+        for col, value in edits.items():
+            du_stats.set(int(row), int(col), value)
+
+    # Cheap check that the statistics still describe the grid being drawn
+    grid_values = edited_grid.to_numpy(dtype=float)
+    if (len(du_stats) != int(np.count_nonzero(~np.isnan(grid_values)))
+            or not np.isclose(du_stats.summary()['sum_all_boxes'], np.nansum(grid_values))):
+        du_stats.sync(edited_grid)
+    summary = du_stats.summary()
+    if summary['count_boxes_with_data']:
+        st.write(f"Boxes: {summary['count_boxes_with_data']}, Avg: {summary['average_all_samples']:.2f}, "
+                 f"DUlq: {summary['distribution_uniformity']:.2f}%")
 
     # Generate heatmap
     if st.button("Generate Heatmap"):
-        plot_heatmap(edited_grid, "Heatmap of % Volumetrischer Wassergehalt", image)
+        plot_heatmap(edited_grid, "Heatmap of % Volumetrischer Wassergehalt", image, summary)
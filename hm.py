@@ -1,12 +1,11 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.interpolate import griddata
-from matplotlib.colors import ListedColormap, BoundaryNorm
-from scipy.spatial import ConvexHull
-from matplotlib.patches import Polygon
+
+from warmup import heatmap_colormap, LEVELS
+
+# pandas, matplotlib and SciPy are imported inside the functions that use them
 
 def read_excel_data(file_path, sheet_name):
+    import pandas as pd
     # Read the specified range from the Excel file (B6:P20)
     df = pd.read_excel(file_path, sheet_name=sheet_name)
     messwerte_data = df.iloc[5:20, 1:16]
@@ -33,6 +32,8 @@ def calculate_summary_statistics(data):
     return summary
 
 def plot_heatmap(data, title, summary):
+    import matplotlib.pyplot as plt
+    from scipy.interpolate import griddata
     # Flatten the data and create coordinate points
     values = data.values.flatten()
     num_values = len(values)
@@ -54,10 +55,8 @@ def plot_heatmap(data, title, summary):
     grid_z = griddata(points, values_list, (grid_x, grid_y), method='cubic')
 
     # Define the color levels and colormap
-    levels = [0, 9, 16, 20, 25]
-    colors = ['yellow', 'limegreen', 'green', 'darkgreen']
-    cmap = ListedColormap(colors)
-    norm = BoundaryNorm(levels, ncolors=cmap.N, clip=True)
+    levels = LEVELS
+    cmap, norm = heatmap_colormap()
 
     # Generate heatmap using contourf with absolute color transitions
     fig, ax = plt.subplots(figsize=(12, 8))
@@ -112,11 +111,12 @@ def plot_heatmap(data, title, summary):
     plt.subplots_adjust(right=0.85)  # Adjust to make room for the summary text
     plt.show()
 
-# File path to the Excel data
-file_path = 'Distribution_Uniformity.xlsx'
+if __name__ == '__main__':
+    # File path to the Excel data
+    file_path = 'Distribution_Uniformity.xlsx'
 
-# Read, calculate summary statistics, and plot data for Example 1, Example 2, and Example 3
-for sheet_name in ['Example 1', 'Example 2', 'Example 3']:
-    data = read_excel_data(file_path, sheet_name)
-    summary = calculate_summary_statistics(data)
-    plot_heatmap(data, f"Heatmap of % Vol. Wassergehalt - {sheet_name}", summary)
+    # Read, calculate summary statistics, and plot data for Example 1, Example 2, and Example 3
+    for sheet_name in ['Example 1', 'Example 2', 'Example 3']:
+        data = read_excel_data(file_path, sheet_name)
+        summary = calculate_summary_statistics(data)
+        plot_heatmap(data, f"Heatmap of % Vol. Wassergehalt - {sheet_name}", summary)
@@ -0,0 +1,171 @@
+import argparse
+import json
+import math
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# Boxes are 3 m squares. The grid's origin is the outer corner of box (0, 0),
+# so any inset from the edge of the green is part of choosing that origin.
+BOX_SIZE_M = 3.0
+EARTH_RADIUS_M = 6371008.8
+
+
+def project_to_green(lat, lon, origin_lat, origin_lon, bearing_deg=90.0):
+    """Project lat/lon (degrees) into the green's local frame in metres.
+
+    The origin is the outer corner of box (0, 0). Columns run along
+    ``bearing_deg`` (clockwise from north, 90 = east) and rows run 90 degrees
+    clockwise from that, so with the defaults rows grow southwards like the
+    rows of the image grid. Greens are small enough that an equirectangular
+    projection around the origin is accurate to well under a centimetre.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    east = np.radians(lon - origin_lon) * EARTH_RADIUS_M * math.cos(math.radians(origin_lat))
+    north = np.radians(lat - origin_lat) * EARTH_RADIUS_M
+
+    theta = math.radians(bearing_deg)
+    along_cols = east * math.sin(theta) + north * math.cos(theta)
+    along_rows = east * math.cos(theta) - north * math.sin(theta)
+    return along_cols, along_rows
+
+
+class ProbeGridAccumulator:
+    """Aggregates probe readings into the box grid chunk by chunk.
+
+    Memory depends only on the grid size, never on the number of readings:
+    the mean keeps a running sum and count per box, and the median keeps a
+    histogram per box with ``resolution`` wide bins over ``value_range``.
+    Medians are therefore exact to within half a bin. Readings outside
+    ``value_range`` are counted in the nearest edge bin, and ``clipped`` counts
+    how many times that happened.
+
+    Readings are matched to boxes with a KD-tree over the box centres. By
+    default every reading inside a box counts towards it. Pass
+    ``max_distance`` (metres) to snap only readings within that radius of a
+    box centre and drop the rest.
+    """
+
+    def __init__(self, rows, cols, box_size=BOX_SIZE_M, how='mean', max_distance=None,
+                 value_range=(0.0, 100.0), resolution=0.1):
+        if how not in ('mean', 'median'):
+            raise ValueError(f"how must be 'mean' or 'median', not {how!r}")
+        self.rows = rows
+        self.cols = cols
+        self.box_size = box_size
+        self.how = how
+
+        col_idx, row_idx = np.meshgrid(np.arange(cols), np.arange(rows))
+        centres = np.column_stack([(col_idx.ravel() + 0.5) * box_size, (row_idx.ravel() + 0.5) * box_size])
+        self._tree = cKDTree(centres)
+        if max_distance is None:
+            # Nearest centre under the max-norm within half a box is the box the point falls in
+            self._p = np.inf
+            self._bound = np.nextafter(box_size / 2, np.inf)
+        else:
+            self._p = 2
+            self._bound = np.nextafter(max_distance, np.inf)
+
+        n_boxes = rows * cols
+        self.counts = np.zeros(n_boxes, dtype=np.int64)
+        self.sums = np.zeros(n_boxes, dtype=float)
+        if how == 'median':
+            self._lo, hi = value_range
+            self._resolution = resolution
+            self._n_bins = int(round((hi - self._lo) / resolution)) + 1
+            self._hist = np.zeros((n_boxes, self._n_bins), dtype=np.int64)
+        self.clipped = 0
+
+    def add(self, x, y, values):
+        """Add readings at local coordinates ``x`` (along columns) and ``y`` (along rows)."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        values = np.asarray(values, dtype=float)
+        keep = np.isfinite(x) & np.isfinite(y) & np.isfinite(values)
+        if not keep.any():
+            return
+        x, y, values = x[keep], y[keep], values[keep]
+
+        dist, box = self._tree.query(np.column_stack([x, y]), p=self._p, distance_upper_bound=self._bound)
+        hit = np.isfinite(dist)
+        box, values = box[hit], values[hit]
+
+        n_boxes = self.rows * self.cols
+        self.counts += np.bincount(box, minlength=n_boxes)
+        self.sums += np.bincount(box, weights=values, minlength=n_boxes)
+        if self.how == 'median':
+            bins = np.rint((values - self._lo) / self._resolution)
+            outside = (bins < 0) | (bins > self._n_bins - 1)
+            self.clipped += int(outside.sum())
+            bins = np.clip(bins, 0, self._n_bins - 1).astype(np.int64)
+            flat = np.bincount(box * self._n_bins + bins, minlength=n_boxes * self._n_bins)
+            self._hist += flat.reshape(n_boxes, self._n_bins)
+
+    def to_grid(self):
+        """Return the aggregated readings in the ``create_empty_grid`` layout, NaN where a box got none."""
+        result = np.full(self.rows * self.cols, np.nan)
+        filled = self.counts > 0
+        if self.how == 'mean':
+            result[filled] = self.sums[filled] / self.counts[filled]
+        else:
+            cum = np.cumsum(self._hist[filled], axis=1)
+            n = self.counts[filled][:, None]
+            # Middle order statistics (0-based); equal for odd counts
+            low = (cum <= (n - 1) // 2).sum(axis=1)
+            high = (cum <= n // 2).sum(axis=1)
+            result[filled] = self._lo + (low + high) / 2 * self._resolution
+        return pd.DataFrame(result.reshape(self.rows, self.cols), index=np.arange(self.rows), columns=np.arange(self.cols))
+
+
+def ingest_probe_csv(path, origin_lat, origin_lon, rows, cols, bearing_deg=90.0, how='mean',
+                     max_distance=None, lat_col='lat', lon_col='lon', value_col='reading',
+                     chunksize=200_000, **accumulator_kwargs):
+    """Stream a probe CSV of (lat, lon, reading) rows into a rows x cols box grid.
+
+    The file is read ``chunksize`` rows at a time, so files with millions of
+    readings are handled in constant memory. Non-numeric values are treated
+    as missing and skipped. The returned DataFrame can be passed straight to
+    ``calculate_summary_statistics`` and ``plot_heatmap``. A warning is issued
+    if a median had to clip readings outside its ``value_range``.
+    """
+    acc = ProbeGridAccumulator(rows, cols, how=how, max_distance=max_distance, **accumulator_kwargs)
+    reader = pd.read_csv(path, usecols=[lat_col, lon_col, value_col], chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.apply(pd.to_numeric, errors='coerce')
+        x, y = project_to_green(chunk[lat_col].to_numpy(), chunk[lon_col].to_numpy(),
+                                origin_lat, origin_lon, bearing_deg)
+        acc.add(x, y, chunk[value_col].to_numpy())
+    if acc.clipped:
+        warnings.warn(f"{acc.clipped} readings outside value_range were clipped into the edge bins of the median histogram")
+    return acc.to_grid()
+
+
+def grid_to_request(grid):
+    # Same shape as coord_input.json; /generate_heatmap reads it back with grid_from_request
+    data = {str(c): {str(r): float(v) for r, v in grid[c].items() if not np.isnan(v)} for c in grid.columns}
+    return {'data': data, 'rows': grid.shape[0], 'cols': grid.shape[1]}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aggregate TDR probe CSV readings into the 3 m box grid")
+    parser.add_argument('csv')
+    parser.add_argument('--origin-lat', type=float, required=True)
+    parser.add_argument('--origin-lon', type=float, required=True)
+    parser.add_argument('--bearing', type=float, default=90.0)
+    parser.add_argument('--rows', type=int, default=15)
+    parser.add_argument('--cols', type=int, default=15)
+    parser.add_argument('--how', choices=['mean', 'median'], default='mean')
+    parser.add_argument('--max-distance', type=float, default=None)
+    parser.add_argument('--lat-col', default='lat')
+    parser.add_argument('--lon-col', default='lon')
+    parser.add_argument('--value-col', default='reading')
+    args = parser.parse_args()
+
+    grid = ingest_probe_csv(args.csv, args.origin_lat, args.origin_lon, args.rows, args.cols,
+                            bearing_deg=args.bearing, how=args.how, max_distance=args.max_distance,
+                            lat_col=args.lat_col, lon_col=args.lon_col, value_col=args.value_col)
+    json.dump(grid_to_request(grid), sys.stdout, indent=2)
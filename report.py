@@ -0,0 +1,277 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from warmup import LEVELS, warm_up
+
+# Builds a calibration-round deck (PPTX and/or PDF) with one slide per green.
+# Heatmaps are rendered in worker processes as transparent overlays and cached
+# on disk by content, so re-running a report only renders the greens whose
+# data changed. On each slide the background image is placed under the
+# overlay as its own picture; python-pptx stores identical image files once
+# per package, so a shared background is embedded in the PPTX only once.
+# The PDF is written page by page, but PDF pages cannot share an image, so
+# there the background is stored with every page.
+
+RENDER_VERSION = '2'
+# griddata needs this many boxes with data for a cubic interpolation
+MIN_POINTS = 4
+SUMMARY_ROWS = [
+    ('Sum', 'sum_all_boxes', '{:.1f}'),
+    ('Count', 'count_boxes_with_data', '{}'),
+    ('Avg', 'average_all_samples', '{:.2f}'),
+    ('Low Qtr Cups', 'no_of_cups_lowest_quarter', '{}'),
+    ('Low Qtr Sum', 'sum_values_lowest_quarter', '{:.1f}'),
+    ('Low Qtr Avg', 'average_lowest_quarter', '{:.2f}'),
+    ('DUlq', 'distribution_uniformity', '{:.2f}%'),
+]
+
+# png_path is the cached overlay and axes_box (x0, y0, x1, y1, in fractions of
+# the overlay) the area the background must fill under it
+RenderedGreen = namedtuple('RenderedGreen', ['name', 'png_path', 'summary', 'background', 'axes_box'])
+
+
+def render_key(grid, title):
+    digest = hashlib.sha1()
+    digest.update(repr((RENDER_VERSION, LEVELS, grid.shape, title)).encode())
+    digest.update(np.ascontiguousarray(grid.to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def _render_green(job):
+    import matplotlib.pyplot as plt
+    from scipy.spatial import QhullError
+    from app import calculate_summary_statistics, draw_heatmap
+    name, grid, out_path = job
+    box_path = f'{out_path[:-len(".png")]}.json'
+
+    count = int(np.count_nonzero(~np.isnan(grid.to_numpy(dtype=float))))
+    if count == 0:
+        return None, None, None
+    summary = {key: value.item() if hasattr(value, 'item') else value
+               for key, value in calculate_summary_statistics(grid).items()}
+    if count < MIN_POINTS:
+        return None, summary, None
+
+    if not (os.path.exists(out_path) and os.path.exists(box_path)):
+        try:
+            fig, ax = draw_heatmap(grid, f"Heatmap of % Vol. Wassergehalt - {name}")
+        except (ValueError, QhullError):
+            # e.g. every box with data lies on one line
+            return None, summary, None
+        # The axes only settle their equal-aspect position when drawn
+        fig.canvas.draw()
+        position = ax.get_position()
+        axes_box = [float(position.x0), float(position.y0), float(position.x1), float(position.y1)]
+        tmp_path = f'{out_path}.{os.getpid()}.tmp'
+        fig.savefig(tmp_path, format='png', transparent=True)
+        plt.close(fig)
+        with open(f'{box_path}.{os.getpid()}.tmp', 'w') as f:
+            json.dump(axes_box, f)
+        os.replace(f'{box_path}.{os.getpid()}.tmp', box_path)
+        os.replace(tmp_path, out_path)
+    else:
+        with open(box_path) as f:
+            axes_box = json.load(f)
+    return out_path, summary, tuple(axes_box)
+
+
+def _missing_heatmap_text(summary):
+    count = summary['count_boxes_with_data'] if summary else 0
+    return (f"No heatmap: {count} boxes with data, at least {MIN_POINTS} "
+            f"(not all in one line) are needed.")
+
+
+def render_greens(greens, cache_dir, workers=None):
+    """Render every green's heatmap overlay in parallel, reusing cached PNGs.
+
+    ``greens`` is a list of ``(name, grid, background_path)`` tuples, where
+    ``background_path`` may be None. Returns a ``RenderedGreen`` per green in
+    the same order. ``png_path`` is None for greens with too few boxes to
+    interpolate, and ``summary`` is None for greens with no data; those get a
+    placeholder slide instead of failing the report.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    jobs = [(name, grid, os.path.join(cache_dir, f'{render_key(grid, name)}.png')) for name, grid, _ in greens]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as pool:
+        results = list(pool.map(_render_green, jobs))
+    return [RenderedGreen(name, png_path, summary, background, axes_box)
+            for (name, _, background), (png_path, summary, axes_box) in zip(greens, results)]
+
+
+def _image_size(path):
+    from PIL import Image
+    with Image.open(path) as image:
+        return image.size
+
+
+def _background_rect(left, top, width, height, axes_box):
+    # Where the background goes inside a picture placed at (left, top); y is
+    # measured downwards here but upwards in matplotlib's axes_box
+    x0, y0, x1, y1 = axes_box
+    return left + x0 * width, top + (1 - y1) * height, (x1 - x0) * width, (y1 - y0) * height
+
+
+def _slide_layout(prs, name=None):
+    from pptx.enum.shapes import PP_PLACEHOLDER
+
+    if name is not None:
+        for layout in prs.slide_layouts:
+            if layout.name == name:
+                return layout
+        raise ValueError(f"template has no slide layout named {name!r}")
+
+    # A 'title only' layout, found by its placeholders so it works whatever
+    # language the template is in
+    titles = {PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE}
+    ignored = {PP_PLACEHOLDER.DATE, PP_PLACEHOLDER.FOOTER, PP_PLACEHOLDER.SLIDE_NUMBER}
+    for layout in prs.slide_layouts:
+        types = [ph.placeholder_format.type for ph in layout.placeholders if ph.placeholder_format.type not in ignored]
+        if len(types) == 1 and types[0] in titles:
+            return layout
+    return prs.slide_layouts[0]
+
+
+def _remove_slides(prs):
+    # Keep the template's master and layouts but none of its slides
+    slide_ids = prs.slides._sldIdLst
+    for slide_id in list(slide_ids):
+        prs.part.drop_rel(slide_id.rId)
+        slide_ids.remove(slide_id)
+
+
+def write_pptx(rendered, out_path, template=None, layout_name=None):
+    from pptx import Presentation
+    from pptx.util import Emu, Pt
+
+    prs = Presentation(template)
+    _remove_slides(prs)
+    layout = _slide_layout(prs, layout_name)
+    width, height = prs.slide_width, prs.slide_height
+    margin = int(width * 0.03)
+    top = int(height * 0.15)
+    table_width = int(width * 0.25)
+
+    for name, png_path, summary, background, axes_box in rendered:
+        slide = prs.slides.add_slide(layout)
+        if slide.shapes.title is not None:
+            slide.shapes.title.text = name
+
+        picture_width = width - table_width - 3 * margin
+        if png_path is None:
+            box = slide.shapes.add_textbox(margin, top, picture_width, int(height * 0.1))
+            box.text_frame.text = _missing_heatmap_text(summary)
+        else:
+            png_width, png_height = _image_size(png_path)
+            picture_height = picture_width * png_height // png_width
+            if background is not None:
+                # Added by path; identical images are stored in the package once
+                rect = _background_rect(margin, top, picture_width, picture_height, axes_box)
+                slide.shapes.add_picture(background, *(int(v) for v in rect))
+            slide.shapes.add_picture(png_path, margin, top, picture_width, picture_height)
+        if summary is None:
+            continue
+
+        table = slide.shapes.add_table(len(SUMMARY_ROWS), 2, width - table_width - margin, top,
+                                       table_width, Emu(int(height * 0.04) * len(SUMMARY_ROWS))).table
+        for i, (label, key, fmt) in enumerate(SUMMARY_ROWS):
+            for j, text in enumerate([label, fmt.format(summary[key])]):
+                cell = table.cell(i, j)
+                cell.text = text
+                cell.text_frame.paragraphs[0].font.size = Pt(11)
+
+    # python-pptx can only write the package as a whole, so the deck is held
+    # in memory until here; the shared background is in it only once
+    prs.save(out_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_background(path):
+    from PIL import Image
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def write_pdf(rendered, out_path):
+    import matplotlib.image as mpimg
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    page_width, page_height = 11.69, 8.27
+    # PdfPages writes each page to the file as soon as it is saved
+    with PdfPages(out_path) as pdf:
+        for name, png_path, summary, background, axes_box in rendered:
+            fig = plt.figure(figsize=(page_width, page_height))
+            if png_path is None:
+                ax = fig.add_axes([0.02, 0.05, 0.7, 0.85])
+                ax.text(0.5, 0.5, _missing_heatmap_text(summary), ha='center', va='center')
+                ax.axis('off')
+            else:
+                # Fit the overlay into the left 70% of the page, keeping its aspect
+                png_width, png_height = _image_size(png_path)
+                width = min(0.7, 0.85 * page_height / page_width * png_width / png_height)
+                height = width * page_width / page_height * png_height / png_width
+                left, bottom = 0.02, 0.05 + (0.85 - height) / 2
+                if background is not None:
+                    x0, y0, x1, y1 = axes_box
+                    bg_ax = fig.add_axes([left + x0 * width, bottom + y0 * height, (x1 - x0) * width, (y1 - y0) * height])
+                    bg_ax.imshow(_load_background(background), aspect='auto')
+                    bg_ax.axis('off')
+                ax = fig.add_axes([left, bottom, width, height])
+                ax.imshow(mpimg.imread(png_path), aspect='auto')
+                ax.axis('off')
+            fig.suptitle(name)
+            if summary is None:
+                pdf.savefig(fig)
+                plt.close(fig)
+                continue
+
+            table_ax = fig.add_axes([0.75, 0.4, 0.22, 0.4])
+            table_ax.axis('off')
+            cells = [[label, fmt.format(summary[key])] for label, key, fmt in SUMMARY_ROWS]
+            table_ax.table(cellText=cells, loc='center').set_fontsize(10)
+
+            pdf.savefig(fig)
+            plt.close(fig)
+
+
+def build_report(greens, pptx_path=None, pdf_path=None, template=None, cache_dir='.render_cache', workers=None,
+                 layout_name=None):
+    rendered = render_greens(greens, cache_dir, workers)
+    if pptx_path:
+        write_pptx(rendered, pptx_path, template, layout_name)
+    if pdf_path:
+        from warmup import use_headless_backend
+        use_headless_backend()
+        write_pdf(rendered, pdf_path)
+    return rendered
+
+
+if __name__ == '__main__':
+    from hm import read_excel_data
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Build a heatmap report with one slide per green (one Excel sheet each)")
+    parser.add_argument('excel')
+    parser.add_argument('--sheets', nargs='*', help="sheets to include, default all")
+    parser.add_argument('--background', help="image shown behind every heatmap")
+    parser.add_argument('--pptx')
+    parser.add_argument('--pdf')
+    parser.add_argument('--template', help="PPTX whose slide master and layouts are used (its slides are dropped)")
+    parser.add_argument('--layout', help="slide layout name in the template, default the first title-only layout")
+    parser.add_argument('--cache-dir', default='.render_cache')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    if not args.pptx and not args.pdf:
+        parser.error("give --pptx and/or --pdf")
+    sheets = args.sheets or pd.ExcelFile(args.excel).sheet_names
+    greens = [(sheet, read_excel_data(args.excel, sheet), args.background) for sheet in sheets]
+    build_report(greens, args.pptx, args.pdf, args.template, args.cache_dir, args.workers, args.layout)
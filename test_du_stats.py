@@ -0,0 +1,98 @@
+import math
+import random
+import unittest
+import warnings
+
+import numpy as np
+
+from app import calculate_summary_statistics, create_empty_grid
+from du_stats import IncrementalDUStatistics
+
+# Float fields may differ from NumPy's pairwise sums in the last bits
+RTOL = 1e-12
+COUNT_KEYS = ['count_boxes_with_data', 'no_of_cups_lowest_quarter', 'count_boxes_lowest_quarter']
+
+
+def random_reading(rng):
+    # Catch-can readings as staff enter them: whole numbers or one/two decimals
+    return round(rng.uniform(0, 40), rng.choice([0, 1, 2]))
+
+
+class IncrementalDUStatisticsTest(unittest.TestCase):
+
+    def assertMatchesGrid(self, stats, grid):
+        expected = calculate_summary_statistics(grid)
+        actual = stats.summary()
+        self.assertEqual(set(actual), set(expected))
+        for key in COUNT_KEYS:
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertEqual(stats.percentile_25(), np.percentile(grid.values[~np.isnan(grid.values)], 25))
+        for key in set(expected) - set(COUNT_KEYS):
+            if math.isnan(expected[key]):
+                self.assertTrue(math.isnan(actual[key]), key)
+            else:
+                self.assertTrue(math.isclose(actual[key], expected[key], rel_tol=RTOL), (key, actual[key], expected[key]))
+
+    def run_sequence(self, seed, rows, cols, steps, clear_rate):
+        rng = random.Random(seed)
+        grid = create_empty_grid(rows, cols)
+        stats = IncrementalDUStatistics()
+        for _ in range(steps):
+            row, col = rng.randrange(rows), rng.randrange(cols)
+            value = None if rng.random() < clear_rate else random_reading(rng)
+            grid.iat[row, col] = np.nan if value is None else value
+            stats.set(row, col, value)
+            self.assertEqual(len(stats), int(grid.notna().values.sum()))
+            if len(stats):
+                self.assertMatchesGrid(stats, grid)
+        return grid, stats
+
+    def test_random_edit_sequences(self):
+        with warnings.catch_warnings():
+            # All-zero grids divide by zero in NumPy too
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for seed in range(100):
+                rng = random.Random(seed)
+                self.run_sequence(seed, rng.randint(1, 30), rng.randint(1, 30), 120, rng.choice([0.0, 0.2, 0.5]))
+
+    def test_same_cell_set_repeatedly(self):
+        rng = random.Random(1)
+        grid = create_empty_grid(5, 5)
+        grid.iloc[0, :] = [3.0, 7.5, 12.0, 18.25, 20.0]
+        stats = IncrementalDUStatistics.from_grid(grid)
+        for _ in range(200):
+            value = random_reading(rng)
+            grid.iat[2, 3] = value
+            stats.set(2, 3, value)
+            stats.set(2, 3, value)
+            self.assertEqual(len(stats), 6)
+            self.assertMatchesGrid(stats, grid)
+
+    def test_grid_empties_and_refills(self):
+        grid, stats = self.run_sequence(seed=7, rows=6, cols=4, steps=60, clear_rate=0.1)
+        for row in range(6):
+            for col in range(4):
+                stats.clear(row, col)
+        self.assertEqual(len(stats), 0)
+        self.assertEqual(stats.summary()['count_boxes_with_data'], 0)
+        self.assertTrue(math.isnan(stats.summary()['distribution_uniformity']))
+
+        grid = create_empty_grid(6, 4)
+        rng = random.Random(8)
+        for row in range(6):
+            for col in range(4):
+                value = random_reading(rng)
+                grid.iat[row, col] = value
+                stats.set(row, col, value)
+        self.assertMatchesGrid(stats, grid)
+
+    def test_sync_matches_grid(self):
+        grid, stats = self.run_sequence(seed=3, rows=8, cols=8, steps=80, clear_rate=0.3)
+        grid.iloc[:, :2] = np.nan
+        grid.iat[7, 7] = 11.5
+        stats.sync(grid)
+        self.assertMatchesGrid(stats, grid)
+
+
+if __name__ == '__main__':
+    unittest.main()
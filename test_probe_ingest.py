@@ -0,0 +1,128 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app import grid_from_request
+from probe_ingest import (EARTH_RADIUS_M, ProbeGridAccumulator, grid_to_request, ingest_probe_csv,
+                          project_to_green)
+
+ORIGIN_LAT, ORIGIN_LON = 47.3, 8.5
+ROWS, COLS = 5, 7
+
+
+def local_to_latlon(x, y, bearing_deg):
+    # Inverse of project_to_green: the rotation matrix is its own inverse
+    theta = math.radians(bearing_deg)
+    east = x * math.sin(theta) + y * math.cos(theta)
+    north = x * math.cos(theta) - y * math.sin(theta)
+    lat = ORIGIN_LAT + math.degrees(north / EARTH_RADIUS_M)
+    lon = ORIGIN_LON + math.degrees(east / (EARTH_RADIUS_M * math.cos(math.radians(ORIGIN_LAT))))
+    return lat, lon
+
+
+def synthesise(rng, bearing_deg, readings_per_box, reading, outside=50):
+    """Points well inside known boxes plus points outside the grid.
+
+    Returns the CSV rows and the readings each box should receive.
+    """
+    rows, expected = [], {}
+    for r in range(ROWS):
+        for c in range(COLS):
+            if rng.random() < 0.2:
+                continue
+            for _ in range(rng.randint(1, readings_per_box)):
+                x = (c + rng.uniform(0.05, 0.95)) * 3
+                y = (r + rng.uniform(0.05, 0.95)) * 3
+                value = reading(rng)
+                rows.append((*local_to_latlon(x, y, bearing_deg), value))
+                expected.setdefault((r, c), []).append(value)
+    for _ in range(outside):
+        x = rng.choice([rng.uniform(-20, -0.5), rng.uniform(COLS * 3 + 0.5, COLS * 3 + 20)])
+        y = rng.uniform(-20, ROWS * 3 + 20)
+        rows.append((*local_to_latlon(x, y, bearing_deg), reading(rng)))
+    rng.shuffle(rows)
+    return pd.DataFrame(rows, columns=['lat', 'lon', 'reading']), expected
+
+
+class ProbeIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_csv(self, frame):
+        path = os.path.join(self.tmp.name, 'probe.csv')
+        frame.to_csv(path, index=False)
+        return path
+
+    def test_projection_round_trip(self):
+        for bearing in [90.0, 0.0, 37.5, 200.0]:
+            lat, lon = local_to_latlon(10.0, 4.0, bearing)
+            x, y = project_to_green(lat, lon, ORIGIN_LAT, ORIGIN_LON, bearing)
+            self.assertAlmostEqual(float(x), 10.0, places=6)
+            self.assertAlmostEqual(float(y), 4.0, places=6)
+
+    def test_mean_is_exact(self):
+        rng = random.Random(0)
+        # Quarter steps keep every sum exact, so the mean can be compared with ==
+        frame, expected = synthesise(rng, bearing_deg=63.0, readings_per_box=40,
+                                     reading=lambda rng: rng.randint(0, 120) / 4)
+        path = self.write_csv(frame)
+
+        grid = ingest_probe_csv(path, ORIGIN_LAT, ORIGIN_LON, ROWS, COLS, bearing_deg=63.0, chunksize=37)
+        self.assertEqual(grid.shape, (ROWS, COLS))
+        for r in range(ROWS):
+            for c in range(COLS):
+                if (r, c) in expected:
+                    self.assertEqual(grid.iat[r, c], np.mean(expected[(r, c)]), (r, c))
+                else:
+                    self.assertTrue(np.isnan(grid.iat[r, c]), (r, c))
+
+    def test_median_within_half_a_bin(self):
+        rng = random.Random(1)
+        frame, expected = synthesise(rng, bearing_deg=90.0, readings_per_box=30,
+                                     reading=lambda rng: rng.uniform(0, 40))
+        path = self.write_csv(frame)
+
+        grid = ingest_probe_csv(path, ORIGIN_LAT, ORIGIN_LON, ROWS, COLS, how='median', chunksize=50,
+                                resolution=0.1)
+        for (r, c), values in expected.items():
+            self.assertLessEqual(abs(grid.iat[r, c] - np.median(values)), 0.05 + 1e-9, (r, c))
+        self.assertEqual(int(grid.notna().values.sum()), len(expected))
+
+    def test_median_clipping_warns(self):
+        frame = pd.DataFrame([(*local_to_latlon(1.5, 1.5, 90.0), value) for value in [-5.0, 50.0, 150.0]],
+                             columns=['lat', 'lon', 'reading'])
+        path = self.write_csv(frame)
+        with self.assertWarns(UserWarning):
+            grid = ingest_probe_csv(path, ORIGIN_LAT, ORIGIN_LON, ROWS, COLS, how='median')
+        self.assertEqual(grid.iat[0, 0], 50.0)
+
+        acc = ProbeGridAccumulator(ROWS, COLS, how='median')
+        acc.add([1.5, 1.5, 1.5], [1.5, 1.5, 1.5], [-5.0, 50.0, 150.0])
+        self.assertEqual(acc.clipped, 2)
+
+    def test_max_distance_snaps_near_centres_only(self):
+        acc = ProbeGridAccumulator(ROWS, COLS, max_distance=0.5)
+        acc.add([1.5, 1.8, 2.9, 4.5], [1.5, 1.6, 2.9, 1.5], [10.0, 20.0, 99.0, 30.0])
+        grid = acc.to_grid()
+        self.assertEqual(grid.iat[0, 0], 15.0)
+        self.assertEqual(grid.iat[0, 1], 30.0)
+        self.assertEqual(int(grid.notna().values.sum()), 2)
+
+    def test_request_round_trip(self):
+        acc = ProbeGridAccumulator(ROWS, COLS)
+        acc.add([1.5, 10.5], [1.5, 13.5], [12.0, 7.25])
+        grid = acc.to_grid()
+        request = grid_to_request(grid)
+        restored = grid_from_request(request['data'], request['rows'], request['cols'])
+        pd.testing.assert_frame_equal(restored, grid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+import numpy as np
+
+from app import create_empty_grid
+from report import build_report, render_key
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE = os.path.join(HERE, 'PPT_Heatmaps (1) (2) (2).pptx')
+BACKGROUND = os.path.join(HERE, 'WhatsApp Image 2024-10-10 at 09.25.42.jpeg')
+
+
+def full_grid(seed):
+    grid = create_empty_grid(6, 6)
+    grid.iloc[1:5, 1:5] = np.random.default_rng(seed).uniform(5, 25, size=(4, 4)).round(1)
+    return grid
+
+
+def sparse_greens():
+    two_boxes = create_empty_grid(15, 15)
+    two_boxes.iat[3, 3] = 10.0
+    two_boxes.iat[5, 7] = 12.0
+    in_a_line = create_empty_grid(15, 15)
+    in_a_line.iloc[4, 2:8] = [5.0, 8.0, 9.0, 11.0, 13.0, 15.0]
+    return [('Two', two_boxes, BACKGROUND), ('Empty', create_empty_grid(15, 15), BACKGROUND),
+            ('Line', in_a_line, BACKGROUND)]
+
+
+class ReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+
+    def cache_state(self):
+        return {name: os.stat(os.path.join(self.cache_dir, name)).st_mtime_ns for name in os.listdir(self.cache_dir)}
+
+    def test_render_key(self):
+        grid = full_grid(0)
+        self.assertEqual(render_key(grid, 'A'), render_key(grid.copy(), 'A'))
+        self.assertNotEqual(render_key(grid, 'A'), render_key(grid, 'B'))
+        changed = grid.copy()
+        changed.iat[2, 2] += 0.1
+        self.assertNotEqual(render_key(grid, 'A'), render_key(changed, 'A'))
+
+    def test_report_with_template(self):
+        from pptx import Presentation
+
+        greens = [('Green 1', full_grid(1), BACKGROUND), ('Green 2', full_grid(2), BACKGROUND)] + sparse_greens()
+        pptx_path = os.path.join(self.tmp.name, 'round.pptx')
+        pdf_path = os.path.join(self.tmp.name, 'round.pdf')
+        rendered = build_report(greens, pptx_path, pdf_path, template=TEMPLATE, cache_dir=self.cache_dir, workers=2)
+
+        self.assertEqual([r.png_path is None for r in rendered], [False, False, True, True, True])
+        self.assertIsNone(rendered[3].summary)
+        self.assertEqual(rendered[2].summary['count_boxes_with_data'], 2)
+
+        # The template's own slides are dropped and the title-only layout is used
+        prs = Presentation(pptx_path)
+        self.assertEqual(len(prs.slides), len(greens))
+        self.assertEqual({slide.slide_layout.name for slide in prs.slides}, {'Nur Titel'})
+        self.assertEqual([slide.shapes.title.text for slide in prs.slides], [name for name, _, _ in greens])
+
+        # One shared background plus one overlay per rendered green
+        media = [name for name in zipfile.ZipFile(pptx_path).namelist() if name.startswith('ppt/media/')]
+        self.assertEqual(sorted(os.path.splitext(name)[1] for name in media), ['.jpg', '.png', '.png'])
+        self.assertGreater(os.path.getsize(pdf_path), 0)
+
+        # A second run reuses every cached render
+        before = self.cache_state()
+        again = build_report(greens, pptx_path, template=TEMPLATE, cache_dir=self.cache_dir, workers=2)
+        self.assertEqual(self.cache_state(), before)
+        self.assertEqual(again, rendered)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import functools
+import io
+import os
+import sys
+import threading
+
+# Levels and colours shared by every heatmap entry point
+LEVELS = [0, 9, 16, 20, 25]
+COLORS = ['yellow', 'limegreen', 'green', 'darkgreen']
+
+_warm_lock = threading.Lock()
+_warmed = False
+
+
+def use_headless_backend():
+    # Servers have no display, so always use Agg, overriding any MPLBACKEND
+    # the host sets. The environment variable avoids importing matplotlib
+    # just to set it; if it is already imported, switch it directly.
+    os.environ['MPLBACKEND'] = 'Agg'
+    if 'matplotlib' in sys.modules:
+        sys.modules['matplotlib'].use('Agg')
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(name, size):
+    from PIL import ImageFont
+    return ImageFont.truetype(name, size)
+
+
+@functools.lru_cache(maxsize=None)
+def heatmap_colormap():
+    from matplotlib.colors import ListedColormap, BoundaryNorm
+    cmap = ListedColormap(COLORS)
+    norm = BoundaryNorm(LEVELS, ncolors=cmap.N, clip=True)
+    return cmap, norm
+
+
+def is_warm():
+    return _warmed
+
+
+def warm_up(fonts=(('arial.ttf', 10),)):
+    """Import the heavy modules and render a tiny heatmap once.
+
+    This pays for the pandas/SciPy/matplotlib imports, the matplotlib font
+    cache, the colormap setup and the first Qhull triangulation up front, so
+    the first real request does not. Safe to call more than once.
+    """
+    global _warmed
+    with _warm_lock:
+        if _warmed:
+            return
+
+        use_headless_backend()
+        import numpy as np
+        import pandas as pd
+        import matplotlib.pyplot as plt
+        from scipy.interpolate import griddata
+
+        grid = pd.DataFrame(np.arange(16, dtype=float).reshape(4, 4))
+        values = grid.values.flatten()
+        points = [(i % 4, i // 4) for i in range(len(values))]
+        grid_x, grid_y = np.mgrid[0:4:10j, 0:4:10j]
+        grid_z = griddata(points, values, (grid_x, grid_y), method='cubic')
+
+        cmap, norm = heatmap_colormap()
+        fig, ax = plt.subplots(figsize=(2, 2))
+        contourf = ax.contourf(grid_x, grid_y, grid_z, levels=LEVELS, cmap=cmap, norm=norm, extend='both')
+        cbar = fig.colorbar(contourf, ticks=LEVELS)
+        cbar.set_label('% Vol. Wassergehalt', fontsize=8)
+        fig.text(0.5, 0.5, 'DUlq: 0.00%', fontsize=8, bbox=dict(facecolor='white', alpha=0.5))
+        fig.savefig(io.BytesIO(), format='png')
+        plt.close(fig)
+
+        for name, size in fonts:
+            try:
+                load_font(name, size)
+            except OSError:
+                # Font missing on this host; the request that needs it will report it
+                pass
+
+        _warmed = True